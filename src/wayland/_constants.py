@@ -0,0 +1,2 @@
+FRAMEWORK_NAME = "Wayland"
+GITHUB_URL = "https://github.com/coryfitz/wayland"
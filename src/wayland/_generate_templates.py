@@ -0,0 +1,37 @@
+"""Regenerate wayland/_templates.py from the text templates in this package.
+
+Run ``python -m wayland._generate_templates`` after editing a template.
+"""
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+TEMPLATES_DIR = PACKAGE_DIR / 'templates'
+OUTPUT_PATH = PACKAGE_DIR / '_templates.py'
+
+# logo.png stays a package resource; at ~1 MB it is too big to embed
+TEXT_TEMPLATES = ('settings.py', 'main.py', 'app.py', 'index.py', 'index.html')
+
+HEADER = '''\
+# Generated by `python -m wayland._generate_templates` from the files in
+# wayland/templates. Edit the templates and regenerate instead of editing this.
+'''
+
+def render():
+    """Return the source of the generated templates module."""
+    lines = [HEADER]
+    constants = {}
+    for name in TEXT_TEMPLATES:
+        constant = name.upper().replace('.', '_')
+        constants[name] = constant
+        chunks = (TEMPLATES_DIR / name).read_bytes().splitlines(keepends=True) or [b'']
+        lines.append(f"{constant} = (")
+        lines.extend(f"    {chunk!r}" for chunk in chunks)
+        lines.append(")\n")
+
+    lines.append("TEMPLATES = {")
+    lines.extend(f"    {name!r}: {constant}," for name, constant in constants.items())
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+if __name__ == "__main__":
+    OUTPUT_PATH.write_text(render())
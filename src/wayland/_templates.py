@@ -0,0 +1,115 @@
+# Generated by `python -m wayland._generate_templates` from the files in
+# wayland/templates. Edit the templates and regenerate instead of editing this.
+
+SETTINGS_PY = (
+    b'from pathlib import Path\n'
+    b'\n'
+    b'BASE_DIR = Path(__file__).resolve().parent.parent'
+)
+
+MAIN_PY = (
+    b'from psx_syntax import psx_import, packed\n'
+    b'from moderne.conf import settings\n'
+    b'from pathlib import Path\n'
+    b'\n'
+    b"psx_file_path = Path(settings.BASE_DIR) / 'blog' / 'app' / 'routes' / 'index.psx'\n"
+    b'\n'
+    b"component_name = 'Home'\n"
+    b'\n'
+    b'@packed\n'
+    b'def run():\n'
+    b'    main = psx_import(psx_file_path, component_name)\n'
+    b'    return main()\n'
+    b'\n'
+    b'run()'
+)
+
+APP_PY = (
+    b'from starlette.applications import Starlette\n'
+    b'from starlette.responses import FileResponse\n'
+    b'from starlette.routing import Route, Mount\n'
+    b'from starlette.staticfiles import StaticFiles\n'
+    b'import os\n'
+    b'\n'
+    b'# Define a simple handler to serve the HTML file\n'
+    b'async def homepage(request):\n'
+    b'    app_root = os.path.dirname(__file__)\n'
+    b"    file_path = os.path.join(app_root, 'app', 'static', 'index.html') \n"
+    b'    return FileResponse(file_path)\n'
+    b'\n'
+    b'routes = [\n'
+    b'    Route("/", homepage),\n'
+    b"    Mount('/static', StaticFiles(directory=os.path.join(os.path.dirname(__file__), 'app', 'static')), name='static')\n"
+    b']\n'
+    b'\n'
+    b'# Create the ASGI app\n'
+    b'app = Starlette(routes=routes)\n'
+    b'\n'
+    b'if __name__ == "__main__":\n'
+    b'    import uvicorn\n'
+    b'    uvicorn.run("app:app", host="127.0.0.1", port=8000, reload=True)\n'
+)
+
+INDEX_PY = (
+    b'from psx_syntax import psx_import, packed\n'
+    b'import os\n'
+    b'from pathlib import Path\n'
+    b'from framework.conf import settings\n'
+    b'\n'
+    b"components_path = Path(settings.BASE_DIR) / 'app' / 'components'\n"
+)
+
+INDEX_HTML = (
+    b'<!DOCTYPE html>\n'
+    b'<html lang="en">\n'
+    b'<head>\n'
+    b'    <meta charset="UTF-8">\n'
+    b'    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+    b'    <title>wayland</title>\n'
+    b'    <style>\n'
+    b'        html, body {\n'
+    b'            margin: 0;\n'
+    b'            padding: 0;\n'
+    b'            height: 100vh;\n'
+    b'            overflow: hidden; /* Prevent scrollbars from appearing */\n'
+    b'        }\n'
+    b'\n'
+    b'        body {\n'
+    b'            display: flex;\n'
+    b'            justify-content: space-between;\n'
+    b'            align-items: center;\n'
+    b'            text-align: center;\n'
+    b'            flex-direction: column;\n'
+    b'            padding: 20px 0;\n'
+    b'        }\n'
+    b'\n'
+    b'        h1 {\n'
+    b'            margin: 0;\n'
+    b'        }\n'
+    b'\n'
+    b'        img {\n'
+    b'            width: 50%;\n'
+    b'            max-width: 300px;\n'
+    b'        }\n'
+    b'\n'
+    b'        a {\n'
+    b'            color: black;\n'
+    b'            margin-bottom: 60px;\n'
+    b'        }\n'
+    b'    </style>\n'
+    b'</head>\n'
+    b'<body>\n'
+    b'    <h1>Welcome to the Wayland Web Framework</h1>\n'
+    b'    <img src="static/logo.png" alt="Moderne Logo">\n'
+    b'    <a href="https://moderne.dev" target="_blank">Learn Wayland</a>\n'
+    b'</body>\n'
+    b'</html>\n'
+)
+
+TEMPLATES = {
+    'settings.py': SETTINGS_PY,
+    'main.py': MAIN_PY,
+    'app.py': APP_PY,
+    'index.py': INDEX_PY,
+    'index.html': INDEX_HTML,
+}
@@ -1,142 +1,325 @@
-import argparse
 import importlib
 import os
-import shutil
-import subprocess
-import socket
-import tomllib
-import importlib.resources
-import webbrowser
+import sys
 
-script_dir = os.path.dirname(os.path.abspath(__file__))
-config_path = os.path.join(script_dir, "config.toml")
-
-with open(config_path, "rb") as f:  # "rb" required for tomllib
-    config = tomllib.load(f)
-    FRAMEWORK_NAME = config['framework_name']
+from ._constants import FRAMEWORK_NAME
 
 MODULE_NAME = FRAMEWORK_NAME.lower()
 
+DESCRIPTION = f"{FRAMEWORK_NAME} App Generator and Runner"
+USAGE_NEW = f"Please provide a name for the new app. Usage: '{MODULE_NAME} new <name>'"
+INVALID_COMMAND = f"Invalid command. Use '{MODULE_NAME} new <name>' to create a new app or '{MODULE_NAME} run' to run the development server."
+
+# Text templates and where they are written to, relative to the new app directory
+TEMPLATE_FILES = {
+    'main.py': 'main.py',
+    'app.py': 'app.py',
+    'index.py': 'app/routes/index.py',
+    'index.html': 'app/static/index.html',
+}
+
+def _can_bind(port):
+    """Check whether a loopback port can be bound and listened on."""
+    import socket
+
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            # On Windows SO_REUSEADDR would let the probe share a bound port
+            if os.name != 'nt':
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(('127.0.0.1', port))
+            sock.listen(1)
+    except (socket.error, OverflowError):
+        return False
+    return True
+
 def is_port_in_use(port):
-    """Check if a port is already in use."""
+    """Check if a port is already in use.
+
+    A bind probe catches ports that are reserved without listening, and the
+    connect probe catches listeners the bind cannot see.
+    """
+    import socket
+
+    if not _can_bind(port):
+        return True
+
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-        return sock.connect_ex(('localhost', port)) == 0
+        # A listener answers loopback at once; don't sit out SYN retries
+        sock.settimeout(0.1)
+        return sock.connect_ex(('127.0.0.1', port)) == 0
+
+def find_next_available_port(starting_port=8000, window=32):
+    """Find the next available port starting from the specified port.
+
+    Ports are probed ``window`` at a time with non-blocking connects that are
+    waited on together, so a run of busy ports costs one round trip per window
+    rather than one per port.
+    """
+    import errno
+    import select
+    import socket
 
-def find_next_available_port(starting_port=8000):
-    """Find the next available port starting from the specified port."""
     port = starting_port
-    while is_port_in_use(port):
-        port += 1
-    return port
+    while port <= 65535:
+        candidates = range(port, min(port + window, 65536))
+        in_use = set()
+        refused = set()
+        pending = {}
+        try:
+            for candidate in candidates:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.setblocking(False)
+                result = sock.connect_ex(('127.0.0.1', candidate))
+                if result in (errno.EINPROGRESS, errno.EWOULDBLOCK):
+                    pending[sock] = candidate
+                    continue
+                sock.close()
+                (in_use if result == 0 else refused).add(candidate)
+
+            if pending:
+                _, writable, _ = select.select([], list(pending), [], 0.05)
+                for sock in writable:
+                    if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                        in_use.add(pending[sock])
+                    else:
+                        refused.add(pending[sock])
+        finally:
+            for sock in pending:
+                sock.close()
+
+        # A refused probe already stands in for the connect check, so only the
+        # bind probe is left for those; probes still pending get the full check
+        for candidate in candidates:
+            if candidate in in_use:
+                continue
+            if candidate in refused:
+                free = _can_bind(candidate)
+            else:
+                free = not is_port_in_use(candidate)
+            if free:
+                return candidate
+        port = candidates.stop
+
+    raise OSError(f"No available port found from {starting_port} upwards")
+
+def _serve_in_process(uvicorn, port, workers=None):
+    """Serve the app from this interpreter instead of spawning the uvicorn CLI."""
+    # The uvicorn CLI puts the app directory on sys.path; do the same here
+    sys.path.insert(0, os.getcwd())
+    uvicorn.run("app:app", port=port, workers=workers)
+
+def _can_open_browser():
+    """Check whether this session can plausibly show a browser window."""
+    if not sys.stdout.isatty():
+        return False
+    if sys.platform in ('darwin', 'win32'):
+        return True
+    return any(os.environ.get(var) for var in ('BROWSER', 'DISPLAY', 'WAYLAND_DISPLAY'))
+
+def _open_browser(url):
+    """Open the URL in the default browser, or just print it on headless sessions."""
+    if not _can_open_browser():
+        print(f"Serving at {url}")
+        return
+
+    import webbrowser
+
+    print(f"Opening {url} in your default browser")
+    webbrowser.open(url)
+
+def run_uvicorn(port=8000, reload=True, workers=None, auto_port=None):
+    """Run Uvicorn server with a specific port, hot-reloading unless told otherwise.
+
+    If the port is taken, ``auto_port`` decides whether to move to the next free
+    one; when it is None the user is asked.
+    """
+    import subprocess
 
-def run_uvicorn(port=8000):
-    """Run Uvicorn server with a specific port and hot-reload enabled."""
     try:
         if is_port_in_use(port):
             print(f"Port {port} is already in use.")
-            response = input(f"Do you want to use the next available port (starting from {port + 1})? (y/n): ").strip().lower()
-            if response == 'y':
+            if auto_port is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                # Look for the next free port while waiting on the user's answer
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    next_port = executor.submit(find_next_available_port, port + 1)
+                    response = input(f"Do you want to use the next available port (starting from {port + 1})? (y/n): ").strip().lower()
+                if response != 'y':
+                    print("User declined to use another port. Exiting.")
+                    return  # Exit early, preventing further execution
+                port = next_port.result()
+                # The answer can take a while, so make sure the port is still free
+                if is_port_in_use(port):
+                    port = find_next_available_port(port + 1)
+            elif auto_port:
                 port = find_next_available_port(port + 1)
-                print(f"Using port {port} instead.")
             else:
-                print("User declined to use another port. Exiting.")
-                return  # Exit early, preventing further execution
+                print("Not looking for another port because of --no-auto-port. Exiting.")
+                return
+            print(f"Using port {port} instead.")
 
         print(f"Starting Uvicorn on port {port}...")
-        subprocess.Popen(["uvicorn", "app:app", "--reload", "--port", str(port)])
-        
         url = f"http://localhost:{port}"
-        print(f"Opening {url} in your default browser")
-        webbrowser.open(url)
+
+        if not reload:
+            # Import first so a missing uvicorn fails before a browser is opened
+            import uvicorn
+
+            # Serving blocks, so the browser has to be launched first
+            _open_browser(url)
+            _serve_in_process(uvicorn, port, workers=workers)
+            return
+
+        if workers is not None and workers > 1:
+            print("Ignoring --workers because hot-reload runs a single worker. Use --no-reload to run several.")
+
+        subprocess.Popen(["uvicorn", "app:app", "--reload", "--port", str(port)])
+        _open_browser(url)
 
     except subprocess.CalledProcessError as e:
         print(f"An error occurred while running Uvicorn: {e}")
 
-def create_app_directory(name):
-    """Create a new application directory using templates."""
-    directory_path = os.path.join(os.getcwd(), name)
+_template_root_cache = None
 
-    if os.path.exists(directory_path):
-        print('app name already exists at this directory')
-        return  # Exit early if the directory already exists
+def _template_root():
+    """Return the templates package's resource root, importing it on first use."""
+    global _template_root_cache
+    if _template_root_cache is None:
+        import importlib.resources
 
-    try:
-        os.makedirs(directory_path, exist_ok=True)
+        templates_module = importlib.import_module(f"{MODULE_NAME}.templates")
+        _template_root_cache = importlib.resources.files(templates_module)
+    return _template_root_cache
 
-        TEMPLATES_MODULE = importlib.import_module(f"{MODULE_NAME}.templates")
+def _fast_copy(src, dst):
+    """Copy a file with an in-kernel transfer, falling back to a buffered copy."""
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        infd, outfd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(infd).st_size
 
-        # Copy settings.py
-        new_settings_path = os.path.join(directory_path, 'settings.py')
-        master_settings = importlib.resources.files(TEMPLATES_MODULE) / 'settings.py'
-        shutil.copyfile(master_settings, new_settings_path)
+        # copy_file_range is Linux-only and can share extents on CoW filesystems.
+        # Some filesystems report 0 bytes copied instead of failing, so only a
+        # complete copy counts; anything short falls through to the next method.
+        try:
+            copied = 0
+            while copied < size:
+                sent = os.copy_file_range(infd, outfd, size - copied)
+                if not sent:
+                    break
+                copied += sent
+            if copied == size:
+                return
+        except (AttributeError, OSError):
+            pass
+        fsrc.seek(0)
+        fdst.seek(0)
+        fdst.truncate()
 
-        # Append app-specific settings
-        with open(new_settings_path, 'a') as f:
-            f.write(f"\n# App-specific settings\nAPP_NAME = '{name}'\n")
+        # sendfile only accepts a regular output file on Linux
+        try:
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(outfd, infd, offset, size - offset)
+                if not sent:
+                    break
+                offset += sent
+            if offset == size:
+                return
+        except (AttributeError, OSError):
+            pass
+        fsrc.seek(0)
+        fdst.seek(0)
+        fdst.truncate()
 
-        # Copy main.py
-        new_main_path = os.path.join(directory_path, 'main.py')
-        master_main = importlib.resources.files(TEMPLATES_MODULE) / 'main.py'
-        shutil.copyfile(master_main, new_main_path)
+        import shutil
+        shutil.copyfileobj(fsrc, fdst, length=1 << 20)
 
-        # Copy app.py
-        new_app_path = os.path.join(directory_path, 'app.py')
-        master_app = importlib.resources.files(TEMPLATES_MODULE) / 'app.py'
-        shutil.copyfile(master_app, new_app_path)
+def create_app_directory(name):
+    """Create a new application directory using templates."""
+    from pathlib import Path
 
-        # Create app subdirectories
-        app_dir = os.path.join(directory_path, 'app')
-        os.makedirs(app_dir, exist_ok=True)
+    from . import _templates
 
-        routes_dir = os.path.join(app_dir, 'routes')
-        os.makedirs(routes_dir, exist_ok=True)
+    root = Path(os.getcwd()) / name
 
-        static_dir = os.path.join(app_dir, 'static')
-        os.makedirs(static_dir, exist_ok=True)
+    if root.exists():
+        print('app name already exists at this directory')
+        return  # Exit early if the directory already exists
 
-        # Copy index.py
-        new_index_path = os.path.join(routes_dir, 'index.py')
-        master_index = importlib.resources.files(TEMPLATES_MODULE) / 'index.py'
-        shutil.copyfile(master_index, new_index_path)
+    try:
+        # Create the leaf directories; their parents come along with them
+        (root / 'app' / 'routes').mkdir(parents=True, exist_ok=True)
+        (root / 'app' / 'static').mkdir(parents=True, exist_ok=True)
 
-        # Copy index.html
-        new_index_html_path = os.path.join(static_dir, 'index.html')
-        master_index_html = importlib.resources.files(TEMPLATES_MODULE) / 'index.html'
-        shutil.copyfile(master_index_html, new_index_html_path)
+        # Write settings.py with the app-specific settings appended
+        settings = _templates.SETTINGS_PY + f"\n# App-specific settings\nAPP_NAME = '{name}'\n".encode()
+        (root / 'settings.py').write_bytes(settings)
 
-        # Copy logo.png
-        new_logo_path = os.path.join(static_dir, 'logo.png')
-        master_logo = importlib.resources.files(TEMPLATES_MODULE) / 'logo.png'
-        shutil.copyfile(master_logo, new_logo_path)
+        # The other text templates are embedded too, so they are written straight out
+        for template, destination in TEMPLATE_FILES.items():
+            (root / destination).write_bytes(_templates.TEMPLATES[template])
 
-        print(f"Created a new {FRAMEWORK_NAME} app at {directory_path}")
+        # logo.png is too large to embed and is still copied from the package
+        _fast_copy(_template_root() / 'logo.png', root / 'app' / 'static' / 'logo.png')
+
+        print(f"Created a new {FRAMEWORK_NAME} app at {root}")
 
     except Exception as e:
         print(f"An error occurred while creating the directory: {e}")
 
+def _positive_int(value):
+    """Parse a command-line value as an integer of at least one."""
+    import argparse
+
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got '{value}'")
+    return number
+
+def _dispatch(command, name=None, **run_options):
+    """Run a CLI command with already-parsed arguments."""
+    if command == "new":
+        if name:
+            create_app_directory(name)
+        else:
+            print(USAGE_NEW)
+    elif command == "run":
+        run_uvicorn(**run_options)
+    else:
+        print(INVALID_COMMAND)
+
 def main():
     """CLI entry point."""
+    argv = sys.argv[1:]
+
+    # Invocations without options ('new <name>', 'run') need no parsing, so
+    # they skip building the argparse parser altogether
+    if 1 <= len(argv) <= 2 and not any(arg.startswith('-') for arg in argv):
+        _dispatch(*argv)
+        return
+
+    import argparse
+
     # Create an argument parser
-    parser = argparse.ArgumentParser(description=F"{FRAMEWORK_NAME} App Generator and Runner")
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
     
     # Add 'new' and 'run' commands
     parser.add_argument("command", help="The command to run (e.g., new or run)")
     parser.add_argument("name", nargs='?', help="The name of the app directory to be created (for 'new' command)")
     parser.add_argument("--port", type=int, help="The port to run the development server on (for 'run' command)", default=8000)
+    parser.add_argument("--no-reload", action="store_true", help="Serve in-process without hot-reload (for 'run' command)")
+    parser.add_argument("--workers", type=_positive_int, help="The number of worker processes, used with --no-reload (for 'run' command)")
+    parser.add_argument("--auto-port", action=argparse.BooleanOptionalAction, help="Move to the next free port without asking if the port is taken (for 'run' command)")
 
     # Parse the arguments
     args = parser.parse_args()
 
-    # Check which command is provided
-    if args.command == "new":
-        if args.name:
-            create_app_directory(args.name)
-        else:
-            print(f"Please provide a name for the new app. Usage: '{FRAMEWORK_NAME.lower()} new <name>'")
-    elif args.command == "run":
-        run_uvicorn(port=args.port)
-    else:
-        print(f"Invalid command. Use '{FRAMEWORK_NAME.lower()} new <name>' to create a new app or '{FRAMEWORK_NAME.lower()} run' to run the development server.")
+    _dispatch(args.command, args.name, port=args.port, reload=not args.no_reload, workers=args.workers, auto_port=args.auto_port)
 
 if __name__ == "__main__":
     main()